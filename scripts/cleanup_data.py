@@ -4,19 +4,26 @@ Cleanup script to remove 'Unknown Masjid' entries from all state JSON files
 and update the master index with new counts.
 """
 
-import json
 import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from jsonio import atomic_write, dump_json, load_json
 
 # Paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'masajid', 'states')
 INDEX_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'masajid', '_index.json')
 STATIC_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'static', 'data', 'masajid')
 
-def clean_state_file(filepath):
-    """Remove 'Unknown Masjid' entries from a state file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+# State files are independent, so they are cleaned concurrently
+MAX_WORKERS = 8
+
+def clean_state_file(filepath, static_filepath=None):
+    """Remove 'Unknown Masjid' entries from a state file.
+
+    If static_filepath is given, the cleaned data is also written there.
+    """
+    data = load_json(filepath)
 
     original_count = len(data['masajid'])
 
@@ -29,9 +36,14 @@ def clean_state_file(filepath):
     # Update count in the file
     data['count'] = new_count
 
-    # Write back
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Write back, serializing to a single buffer so it lands in one write()
+    payload = dump_json(data)
+    atomic_write(filepath, payload)
+
+    # Mirror to the static folder without re-reading. That copy is served to
+    # browsers, so it is written compact; the data copy stays readable.
+    if static_filepath:
+        atomic_write(static_filepath, dump_json(data, indent=False))
 
     return data['state'], new_count, removed_count
 
@@ -42,32 +54,49 @@ def main():
     total_removed = 0
     total_count = 0
 
+    # Cleaned state files are mirrored to the static folder as they are written
+    static_states_dir = None
+    if os.path.exists(STATIC_DATA_DIR):
+        static_states_dir = os.path.join(STATIC_DATA_DIR, 'states')
+        os.makedirs(static_states_dir, exist_ok=True)
+
     # Process each state file
-    for filename in sorted(os.listdir(DATA_DIR)):
-        if filename.endswith('.json'):
-            filepath = os.path.join(DATA_DIR, filename)
-            state_name, new_count, removed = clean_state_file(filepath)
-            state_counts[state_name] = new_count
-            total_removed += removed
-            total_count += new_count
-
-            if removed > 0:
-                print(f"  {state_name}: Removed {removed} 'Unknown Masjid' entries, {new_count} remaining")
-            else:
-                print(f"  {state_name}: {new_count} masajid (no changes)")
-
-    # Filter out states with 0 masajid
-    state_counts = {k: v for k, v in state_counts.items() if v > 0}
+    filepaths = []
+    static_filepaths = []
+    with os.scandir(DATA_DIR) as entries:
+        filenames = sorted(e.name for e in entries if e.name.endswith('.json') and e.is_file())
+
+    for filename in filenames:
+        filepaths.append(os.path.join(DATA_DIR, filename))
+        if static_states_dir:
+            static_filepaths.append(os.path.join(static_states_dir, filename))
+        else:
+            static_filepaths.append(None)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(clean_state_file, filepaths, static_filepaths))
+
+    for state_name, new_count, removed in results:
+        state_counts[state_name] = new_count
+        total_removed += removed
+        total_count += new_count
+
+        if removed > 0:
+            print(f"  {state_name}: Removed {removed} 'Unknown Masjid' entries, {new_count} remaining")
+        else:
+            print(f"  {state_name}: {new_count} masajid (no changes)")
+
+    # Filter out states with 0 masajid and sort by name in one pass
+    state_counts = dict(sorted((k, v) for k, v in state_counts.items() if v > 0))
 
     # Update master index
     index_data = {
         "total_count": total_count,
-        "state_counts": dict(sorted(state_counts.items())),
-        "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+        "state_counts": state_counts,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
     }
 
-    with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=2, ensure_ascii=False)
+    atomic_write(INDEX_FILE, dump_json(index_data))
 
     print(f"\n{'='*50}")
     print(f"SUMMARY")
@@ -77,27 +106,12 @@ def main():
     print(f"States with masajid: {len(state_counts)}")
     print(f"\nUpdated _index.json")
 
-    # Copy to static folder
-    if os.path.exists(STATIC_DATA_DIR):
-        print(f"\nCopying cleaned data to static folder...")
+    # Copy index to static folder (state files were already written there)
+    if static_states_dir:
+        print(f"\nWriting static _index.json...")
 
-        # Copy index
         static_index = os.path.join(STATIC_DATA_DIR, '_index.json')
-        with open(static_index, 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, indent=2, ensure_ascii=False)
-
-        # Copy state files
-        static_states_dir = os.path.join(STATIC_DATA_DIR, 'states')
-        os.makedirs(static_states_dir, exist_ok=True)
-
-        for filename in os.listdir(DATA_DIR):
-            if filename.endswith('.json'):
-                src = os.path.join(DATA_DIR, filename)
-                dst = os.path.join(static_states_dir, filename)
-                with open(src, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                with open(dst, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+        atomic_write(static_index, dump_json(index_data, indent=False))
 
         print("Done!")
 
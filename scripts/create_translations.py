@@ -7,11 +7,28 @@ we create minimal translation files that reference the same data.
 """
 
 import os
+import shutil
 from pathlib import Path
 
 # Languages to create translations for
 LANGUAGES = ['ar', 'ur', 'es']
 
+def link_or_copy(src, dst):
+    """Hardlink dst to src, falling back to a copy if links aren't supported.
+
+    Returns False without touching dst if it is already up to date.
+    """
+    if dst.exists():
+        if dst.stat().st_mtime >= src.stat().st_mtime:
+            return False
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g. cross-device or filesystems without hardlink support
+        shutil.copyfile(src, dst)
+    return True
+
 def create_state_translations():
     """Create translation files for all state pages."""
 
@@ -23,44 +40,37 @@ def create_state_translations():
 
     count = 0
 
-    # Iterate through all state directories
-    for state_dir in content_dir.iterdir():
-        if not state_dir.is_dir():
-            continue
-
-        # Skip if it's not a state directory (e.g., _index.md)
-        index_file = state_dir / 'index.md'
-        if not index_file.exists():
-            continue
-
-        # Read the original index.md to get front matter
-        with open(index_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+    # Iterate through all state directories (scandir entries cache d_type,
+    # so is_dir() doesn't need an extra stat per entry)
+    with os.scandir(content_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
 
-        # Create translation files for each language
-        for lang in LANGUAGES:
-            lang_file = state_dir / f'index.{lang}.md'
+            # Skip if it's not a state directory
+            state_dir = Path(entry.path)
+            index_file = state_dir / 'index.md'
+            if not index_file.exists():
+                continue
 
-            # Write the same content (front matter) for each language
-            # Hugo will use i18n for UI translations
-            with open(lang_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Create translation files for each language
+            for lang in LANGUAGES:
+                lang_file = state_dir / f'index.{lang}.md'
 
-            count += 1
+                # Link the same content (front matter) for each language
+                # Hugo will use i18n for UI translations
+                if link_or_copy(index_file, lang_file):
+                    count += 1
 
     print(f"Created {count} translation files for {len(LANGUAGES)} languages")
 
     # Also create translations for _index.md (states list page)
     states_index = content_dir / '_index.md'
     if states_index.exists():
-        with open(states_index, 'r', encoding='utf-8') as f:
-            content = f.read()
-
         for lang in LANGUAGES:
             lang_file = content_dir / f'_index.{lang}.md'
-            with open(lang_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"Created {lang_file.name}")
+            if link_or_copy(states_index, lang_file):
+                print(f"Created {lang_file.name}")
 
 def create_page_translations():
     """Create translation files for standalone pages."""
@@ -75,14 +85,16 @@ def create_page_translations():
         if not page_path.exists():
             continue
 
-        with open(page_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
         for lang in LANGUAGES:
             base_name = page.replace('.md', '')
             lang_file = content_dir / f'{base_name}.{lang}.md'
-            with open(lang_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Standalone pages can be hand-translated, so an existing file is
+            # never replaced, and new ones are independent copies rather than
+            # hardlinks to the English page
+            if lang_file.exists():
+                continue
+
+            shutil.copyfile(page_path, lang_file)
             print(f"Created {lang_file.name}")
 
 if __name__ == '__main__':
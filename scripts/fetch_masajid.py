@@ -2,17 +2,83 @@
 """
 Fetch masajid (Islamic places of worship) data from OpenStreetMap using Overpass API.
 This script queries for all masajid in the USA and exports data organized by state.
+
+Raw Overpass responses are cached in .cache/overpass/ at the repo root, so
+re-running after deleting a state's JSON reuses the last response. Pass
+--no-cache to ignore cached responses and refresh them from the API.
 """
 
-import json
+import gzip
+import hashlib
 import os
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from jsonio import atomic_write, dump_json, load_json, loads_json
 
 # Overpass API endpoint
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
+# Overpass QL query for masajid in a (south, west, north, east) bounding box
+OVERPASS_QUERY_TEMPLATE = """
+[out:json][timeout:120];
+(
+  node["amenity"="place_of_worship"]["religion"="muslim"]({s},{w},{n},{e});
+  way["amenity"="place_of_worship"]["religion"="muslim"]({s},{w},{n},{e});
+  relation["amenity"="place_of_worship"]["religion"="muslim"]({s},{w},{n},{e});
+);
+out center tags;
+"""
+
+# Overpass allows about 2 concurrent requests per client
+MAX_CONCURRENT_REQUESTS = 2
+
+# Pause after each request (plus random jitter) to be nice to the API
+REQUEST_DELAY = 5
+REQUEST_JITTER = 2
+
+# Raw Overpass responses are cached here, keyed by a hash of the query.
+# --no-cache turns off reads; fresh responses are still written back.
+CACHE_DIR = Path(__file__).parent.parent / ".cache" / "overpass"
+READ_CACHE = True
+
+
+class OverpassRetry(Retry):
+    """Retry policy that also waits before the first retry.
+
+    urllib3 retries immediately the first time, which would re-send the query
+    straight away to an overloaded Overpass server.
+    """
+
+    def get_backoff_time(self):
+        if not self.history:
+            return 0
+        return max(super().get_backoff_time(), self.backoff_factor)
+
+
+# Shared session so requests reuse connections (keep-alive). Up to 3 attempts,
+# waiting 10 then 20 seconds between them; a Retry-After header on 429/503
+# responses takes precedence.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=OverpassRetry(
+        total=2,
+        backoff_factor=10,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset(["POST"]),
+        respect_retry_after_header=True,
+    ),
+))
+
 # US States with their bounding boxes (approx)
 # Format: (south, west, north, east)
 US_STATES = {
@@ -70,58 +136,98 @@ US_STATES = {
 }
 
 
+@lru_cache(maxsize=64)
+def pretty_state_name(state_name):
+    """Turn a state key like 'new_york' into a display name like 'New York'."""
+    return state_name.replace("_", " ").title()
+
+
 def build_overpass_query(bbox):
     """Build Overpass QL query for masajid in a bounding box."""
     south, west, north, east = bbox
-    query = f"""
-    [out:json][timeout:120];
-    (
-      node["amenity"="place_of_worship"]["religion"="muslim"]({south},{west},{north},{east});
-      way["amenity"="place_of_worship"]["religion"="muslim"]({south},{west},{north},{east});
-      relation["amenity"="place_of_worship"]["religion"="muslim"]({south},{west},{north},{east});
-    );
-    out center tags;
+    return OVERPASS_QUERY_TEMPLATE.format(s=south, w=west, n=north, e=east)
+
+
+def cache_path_for(query):
+    """Return the cache file used for an Overpass query."""
+    key = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.json.gz"
+
+
+def read_cached_response(query):
+    """Return the cached raw response for a query, or None if not cached."""
+    cache_path = cache_path_for(query)
+    if not READ_CACHE or not cache_path.exists():
+        return None
+    return gzip.decompress(cache_path.read_bytes())
+
+
+def write_cached_response(query, raw):
+    """Store a raw response in the cache."""
+    cache_path = cache_path_for(query)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(cache_path, gzip.compress(raw))
+
+
+def parse_state_response(raw, state_title):
+    """Decode a raw Overpass response and parse its elements into masajid.
+
+    Overpass reports failures such as timed-out queries as a 200 response
+    with a "remark" and empty or partial elements; those raise ValueError.
     """
-    return query
+    data = loads_json(raw)
+    if "remark" in data:
+        raise ValueError(f"Overpass error: {data['remark']}")
+    parsed = (parse_masjid(element, state_title) for element in data.get("elements", []))
+    return [masjid for masjid in parsed if masjid]
 
 
-def fetch_masajid_for_state(state_name, bbox, retries=3):
-    """Fetch masajid data for a single state with retry logic."""
-    print(f"Fetching masajid for {state_name.replace('_', ' ').title()}...")
+def fetch_masajid_for_state(state_name, bbox):
+    """Fetch masajid data for a single state (retries are handled by SESSION).
+
+    Returns (masajid, used_network); masajid is None on failure.
+    """
+    state_title = pretty_state_name(state_name)
+    print(f"Fetching masajid for {state_title}...")
 
     query = build_overpass_query(bbox)
 
-    for attempt in range(retries):
-        try:
-            response = requests.post(
+    raw = read_cached_response(query)
+    from_cache = raw is not None
+    try:
+        if from_cache:
+            print(f"  Using cached response for {state_title}")
+        else:
+            response = SESSION.post(
                 OVERPASS_URL,
                 data={"data": query},
                 timeout=180
             )
             response.raise_for_status()
-            data = response.json()
-
-            masajid = []
-            for element in data.get("elements", []):
-                masjid = parse_masjid(element, state_name)
-                if masjid:
-                    masajid.append(masjid)
-
-            print(f"  Found {len(masajid)} masajid in {state_name.replace('_', ' ').title()}")
-            return masajid
-
-        except requests.exceptions.RequestException as e:
-            if attempt < retries - 1:
-                wait_time = (attempt + 1) * 10  # 10, 20, 30 seconds
-                print(f"  Retry {attempt + 1}/{retries} after {wait_time}s: {e}")
-                time.sleep(wait_time)
-            else:
-                print(f"  Failed after {retries} attempts: {e}")
-                return None  # Return None to indicate failure (vs empty list)
+            raw = response.content
+
+        masajid = parse_state_response(raw, state_title)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"  Failed for {state_title}: {e}")
+        return None, not from_cache  # None indicates failure (vs empty list)
+
+    # Only cache complete, non-empty responses so anything else is retried.
+    # The cache is optional, so failing to write it doesn't fail the fetch.
+    if not from_cache and masajid:
+        try:
+            write_cached_response(query, raw)
+        except OSError as e:
+            print(f"  Could not cache response for {state_title}: {e}")
 
+    print(f"  Found {len(masajid)} masajid in {state_title}")
+    return masajid, not from_cache
 
-def parse_masjid(element, state_name):
-    """Parse OSM element into masjid data structure."""
+
+def parse_masjid(element, state_title):
+    """Parse OSM element into masjid data structure.
+
+    state_title is the display name used when the element has no addr:state.
+    """
     tags = element.get("tags", {})
 
     # Get coordinates
@@ -137,33 +243,33 @@ def parse_masjid(element, state_name):
     if not lat or not lon:
         return None
 
-    # Extract name
-    name = tags.get("name", tags.get("name:en", tags.get("name:ar", "Unknown Masjid")))
+    # Extract name (`or` stops at the first non-empty tag)
+    name = tags.get("name") or tags.get("name:en") or tags.get("name:ar") or "Unknown Masjid"
+
+    # Combine house number and street if both exist
+    house_number = tags.get("addr:housenumber", "")
+    street = tags.get("addr:street", "")
+    if house_number and street:
+        street = f"{house_number} {street}"
+    else:
+        street = street or house_number
 
     # Extract address components
     address = {
-        "street": tags.get("addr:street", tags.get("addr:housenumber", "")),
+        "street": street,
         "city": tags.get("addr:city", ""),
-        "state": tags.get("addr:state", state_name.replace("_", " ").title()),
+        "state": tags.get("addr:state") or state_title,
         "zip": tags.get("addr:postcode", ""),
         "full": tags.get("addr:full", "")
     }
 
-    # Combine house number and street if both exist
-    house_number = tags.get("addr:housenumber", "")
-    street = tags.get("addr:street", "")
-    if house_number and street:
-        address["street"] = f"{house_number} {street}"
-    elif street:
-        address["street"] = street
-
     return {
         "id": f"{element['type']}_{element['id']}",
         "name": name,
         "address": address,
-        "phone": tags.get("phone", tags.get("contact:phone", "")),
-        "website": tags.get("website", tags.get("contact:website", "")),
-        "email": tags.get("email", tags.get("contact:email", "")),
+        "phone": tags.get("phone") or tags.get("contact:phone", ""),
+        "website": tags.get("website") or tags.get("contact:website", ""),
+        "email": tags.get("email") or tags.get("contact:email", ""),
         "coordinates": {
             "lat": lat,
             "lon": lon
@@ -180,38 +286,50 @@ def save_state_data(state_name, masajid, output_dir):
     output_path = output_dir / f"{state_name}.json"
 
     state_data = {
-        "state": state_name.replace("_", " ").title(),
+        "state": pretty_state_name(state_name),
         "count": len(masajid),
         "masajid": masajid
     }
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(state_data, f, indent=2, ensure_ascii=False)
+    atomic_write(output_path, dump_json(state_data))
 
     print(f"  Saved to {output_path}")
 
 
 def create_master_index(output_dir):
-    """Create master index file with all masajid."""
-    all_masajid = []
+    """Create master index file with per-state and total masajid counts."""
     state_counts = {}
 
+    # Each state file already stores its count, so only that is kept
     for state_file in (output_dir / "states").glob("*.json"):
-        with open(state_file, "r", encoding="utf-8") as f:
-            state_data = json.load(f)
-            state_counts[state_data["state"]] = state_data["count"]
-            all_masajid.extend(state_data["masajid"])
+        state_data = load_json(state_file)
+        state_counts[state_data["state"]] = state_data["count"]
+
+    total_count = sum(state_counts.values())
 
     master_data = {
-        "total_count": len(all_masajid),
+        "total_count": total_count,
         "state_counts": state_counts,
-        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
     }
 
-    with open(output_dir / "_index.json", "w", encoding="utf-8") as f:
-        json.dump(master_data, f, indent=2, ensure_ascii=False)
+    atomic_write(output_dir / "_index.json", dump_json(master_data))
 
-    print(f"\nMaster index created: {len(all_masajid)} total masajid across {len(state_counts)} states")
+    print(f"\nMaster index created: {total_count} total masajid across {len(state_counts)} states")
+
+
+def fetch_and_save_state(state_name, bbox, states_dir):
+    """Fetch and save a single state, pausing afterwards if the API was hit."""
+    masajid, used_network = fetch_masajid_for_state(state_name, bbox)
+    if masajid:
+        save_state_data(state_name, masajid, states_dir)
+
+    # Be nice to the API - jitter keeps the workers from firing in lockstep.
+    # Cache hits never touched the API, so they don't need to wait.
+    if used_network:
+        time.sleep(REQUEST_DELAY + random.uniform(0, REQUEST_JITTER))
+
+    return state_name, masajid
 
 
 def main():
@@ -228,28 +346,31 @@ def main():
     print("=" * 60)
     print()
 
-    # Fetch data for each state
+    # Skip states we already have data for (one directory scan instead of a
+    # stat per state), fetch the rest
+    existing_states = {path.stem for path in states_dir.glob("*.json")}
     total_count = 0
     failed_states = []
-    for state_name, bbox in US_STATES.items():
-        # Skip if already have data for this state
-        state_file = states_dir / f"{state_name}.json"
-        if state_file.exists():
-            print(f"Skipping {state_name.replace('_', ' ').title()} (already exists)")
-            with open(state_file, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-                total_count += existing.get("count", 0)
-            continue
-
-        masajid = fetch_masajid_for_state(state_name, bbox)
-        if masajid is not None and len(masajid) > 0:
-            save_state_data(state_name, masajid, states_dir)
-            total_count += len(masajid)
-        elif masajid is None:
-            failed_states.append(state_name)
-
-        # Be nice to the API - longer wait between requests
-        time.sleep(5)
+    for state_name in US_STATES:
+        if state_name in existing_states:
+            print(f"Skipping {pretty_state_name(state_name)} (already exists)")
+            existing = load_json(states_dir / f"{state_name}.json")
+            total_count += existing.get("count", 0)
+
+    todo = [(s, bbox) for s, bbox in US_STATES.items() if s not in existing_states]
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        futures = [
+            executor.submit(fetch_and_save_state, state_name, bbox, states_dir)
+            for state_name, bbox in todo
+        ]
+        # Collect in submission order so the summary is stable across runs
+        for future in futures:
+            state_name, masajid = future.result()
+            if masajid is None:
+                failed_states.append(state_name)
+            else:
+                total_count += len(masajid)
 
     if failed_states:
         print(f"\nFailed states ({len(failed_states)}): {', '.join(failed_states)}")
@@ -276,11 +397,11 @@ def fetch_single_state(state_name):
     states_dir.mkdir(parents=True, exist_ok=True)
 
     bbox = US_STATES[state_name]
-    masajid = fetch_masajid_for_state(state_name, bbox)
+    masajid, _ = fetch_masajid_for_state(state_name, bbox)
 
     if masajid:
         save_state_data(state_name, masajid, states_dir)
-        print(f"\nSuccess! Found {len(masajid)} masajid in {state_name.replace('_', ' ').title()}")
+        print(f"\nSuccess! Found {len(masajid)} masajid in {pretty_state_name(state_name)}")
     else:
         print(f"\nNo masajid found or error occurred for {state_name}")
 
@@ -288,9 +409,14 @@ def fetch_single_state(state_name):
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) > 1:
+    args = sys.argv[1:]
+    if "--no-cache" in args:
+        args.remove("--no-cache")
+        READ_CACHE = False
+
+    if args:
         # Test with single state
-        state = sys.argv[1].lower().replace(" ", "_")
+        state = args[0].lower().replace(" ", "_")
         fetch_single_state(state)
     else:
         # Fetch all states
@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 """Generate Hugo content pages for each state."""
 
-import json
 import os
 from pathlib import Path
 
+from jsonio import load_json
+
+# Front matter for each state page
+STATE_PAGE_TEMPLATE = """---
+title: "{name}"
+state_name: "{name}"
+state_slug: "{slug}"
+---
+"""
+
 def main():
     script_dir = Path(__file__).parent.parent
     data_dir = script_dir / "data" / "masajid"
@@ -18,14 +27,13 @@ def main():
 title: "Browse States"
 ---
 """
-    with open(content_dir / "_index.md", "w") as f:
-        f.write(index_content)
+    (content_dir / "_index.md").write_text(index_content, encoding="utf-8")
 
     # Load master index
-    with open(data_dir / "_index.json", "r", encoding="utf-8") as f:
-        index = json.load(f)
+    index = load_json(data_dir / "_index.json")
 
     # Create a page for each state
+    created = []
     for state_name in index["state_counts"].keys():
         # Create URL-friendly slug
         slug = state_name.lower().replace(" ", "-")
@@ -35,18 +43,12 @@ title: "Browse States"
         state_dir = content_dir / slug
         state_dir.mkdir(exist_ok=True)
 
-        content = f"""---
-title: "{state_name}"
-state_name: "{state_name}"
-state_slug: "{file_slug}"
----
-"""
-
-        with open(state_dir / "index.md", "w") as f:
-            f.write(content)
+        content = STATE_PAGE_TEMPLATE.format(name=state_name, slug=file_slug)
+        (state_dir / "index.md").write_text(content, encoding="utf-8")
 
-        print(f"Created page for {state_name}")
+        created.append(f"Created page for {state_name}")
 
+    print("\n".join(created))
     print(f"\nGenerated {len(index['state_counts'])} state pages")
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""
+Shared JSON helpers for the data scripts.
+Uses orjson when it is installed and falls back to the stdlib json module.
+Paths may be given as str or Path.
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads_json(raw):
+    """Parse JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_json(path):
+    """Read and parse a JSON file."""
+    with open(path, "rb") as f:
+        return loads_json(f.read())
+
+
+def dump_json(data, indent=True):
+    """Serialize data to UTF-8 JSON bytes, indented or compact."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def atomic_write(path, payload):
+    """Write bytes via a temp file and rename, so a crash never leaves a partial file."""
+    tmp_path = os.fspath(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)